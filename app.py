@@ -1,103 +1,373 @@
-import intake
+from concurrent.futures import ThreadPoolExecutor
+from diskcache import Cache
+import io
+from matplotlib.collections import LineCollection
+from matplotlib.figure import Figure
+from matplotlib.lines import Line2D
 import matplotlib.pyplot as plt
-from matplotlib.ticker import AutoMinorLocator
-from mpl_toolkits.axes_grid1 import AxesGrid
 import numpy as np
 import pandas as pd
 import requests
+from requests.adapters import HTTPAdapter
 import streamlit as st
+import time
 from typing import List
 from typing import Dict
+from typing import Tuple
+from typing import TYPE_CHECKING
+from urllib3.util.retry import Retry
+
+if TYPE_CHECKING:
+    import intake
+
+# tonnes to giggatonnes
+CONVERSION = 1e-9
 
 
 # ---------------------------------------------------------------------
 # read actor pledge information using openClimate API
 # ---------------------------------------------------------------------
-@st.cache
+@st.cache_resource
+def _pledge_session() -> requests.Session:
+    # one pooled session, so pledge requests reuse TCP/TLS connections
+    session = requests.Session()
+    session.headers.update({'Accept': 'application/json'})
+    session.mount("https://", HTTPAdapter(
+        pool_connections=16, pool_maxsize=16,
+        max_retries=Retry(total=3, backoff_factor=0.3)))
+    return session
+
+
+@st.cache_resource
+def _pledge_cache() -> Cache:
+    # on-disk pledge cache, survives server restarts (expires after a day)
+    return Cache('.oc_cache')
+
+
+@st.cache_data(ttl=3600, show_spinner=False)
 def get_actor_pledge(actor_id: str = None) -> List[Dict]:
+    key = f"pledge:{actor_id}"
+    cache = _pledge_cache()
+    targets = cache.get(key)
+    if targets is not None:
+        return targets
+
     server = "https://openclimate.network"
     endpoint = f"/api/v1/actor/{actor_id}"
     url = f"{server}{endpoint}"
-    headers = {'Accept': 'application/json'}
-    response = requests.get(url, headers=headers)
+    response = _pledge_session().get(url, timeout=5)
     data_list = response.json()['data']
-    return data_list['targets']
+    targets = data_list['targets']
+    cache.set(key, targets, expire=86400)
+    return targets
 
 
-def get_target_emissions(data: pd.DataFrame = None, actor_id: str = None) -> Dict:
-    pledges = get_actor_pledge(actor_id)
+def get_baseline_emissions(data: pd.DataFrame = None, baseline_year: float = None) -> float:
+    # data holds a single actor; searchsorted needs its years in order
+    baseline_year = float(baseline_year)
+    if not data['year'].is_monotonic_increasing:
+        data = data.sort_values('year')
+    years = data['year'].to_numpy()
+    idx = np.searchsorted(years, baseline_year)
+    if idx == len(years) or years[idx] != baseline_year:
+        return np.nan
+    return data['total_emissions'].to_numpy()[idx]
+
+
+def get_target_emissions(data: pd.DataFrame = None, pledges: List[Dict] = None) -> Dict:
     baseline_year = pledges[0]['baseline_year']
     target_value = float(pledges[0]['target_value'])
-    baseline_emissions = data.loc[data['year']
-                                  == baseline_year, 'total_emissions']
+    baseline_emissions = get_baseline_emissions(data, baseline_year)
     target_emissions = baseline_emissions*((100-target_value)/100)
     return target_emissions
 
 
-def get_target_emissions_dict(data: pd.DataFrame = None, actor_id: str = None) -> Dict:
-    pledges = get_actor_pledge(actor_id)
+def get_target_emissions_dict(data: pd.DataFrame = None, pledges: List[Dict] = None) -> Dict:
     baseline_year = float(pledges[0]['baseline_year'])
     target_value = float(pledges[0]['target_value'])
-    baseline_emissions = data.loc[data['year']
-                                  == baseline_year, 'total_emissions']
+    baseline_emissions = get_baseline_emissions(data, baseline_year)
     target_emissions = baseline_emissions*((100-target_value)/100)
     return {'target_emissions': target_emissions, 'baseline_year': baseline_year}
 
 
+# ---------------------------------------------------------------------
+# time cached calls, a fast call is a cache hit and a slow one a miss
+# ---------------------------------------------------------------------
+def _timed_call(fn, *args):
+    # only call from the script body, cached functions must stay pure
+    start = time.perf_counter()
+    result = fn(*args)
+    runtime = time.perf_counter() - start
+
+    # (last_runtime, call_count) per cached function for this session
+    stats = st.session_state.setdefault('_cache_stats', {})
+    _, call_count = stats.get(fn.__name__, (0.0, 0))
+    stats[fn.__name__] = (runtime, call_count + 1)
+    return result
+
+
 # ---------------------------------------------------------------------
 # read actor emissions using intake-OpenClimate
 # ---------------------------------------------------------------------
-@st.cache
-def open_catalog() -> intake.catalog.local.YAMLFileCatalog:
+@st.cache_resource
+def open_catalog() -> "intake.catalog.local.YAMLFileCatalog":
+    import intake
+
     catalog = "https://raw.githubusercontent.com/Open-Earth-Foundation/intake-OpenClimate/main/master.yaml"
     cat = intake.open_catalog(catalog)
     return cat
 
 
-@st.cache
+@st.cache_data(ttl=3600, show_spinner=False)
 def read_unfccc() -> pd.DataFrame:
     cat = open_catalog()
-    return cat.emissions.unfccc.read()
+    df = cat.emissions.unfccc.read()
+    df['actor'] = df['actor'].astype('category')
+    df['year'] = df['year'].astype('int32')
+    return df.sort_values(['actor', 'year']).set_index('actor')
 
 
+@st.cache_data(ttl=3600, show_spinner=False)
 def read_primap() -> pd.DataFrame:
     cat = open_catalog()
     return cat.emissions.primap.read()
 
 
-@st.cache
-def read_epa() -> pd.DataFrame:
+def annual_sum(df: pd.DataFrame = None) -> pd.DataFrame:
+    # sum of total_emissions per year, like groupby('year').sum()
+    year_codes, years = pd.factorize(df['year'], sort=True)
+    valid = year_codes >= 0
+    emissions = np.nan_to_num(df['total_emissions'].to_numpy(dtype=float))
+    totals = np.bincount(year_codes[valid], weights=emissions[valid],
+                         minlength=len(years))
+    return pd.DataFrame({'year': years, 'total_emissions': totals})
+
+
+@st.cache_data(ttl=3600, show_spinner=False)
+def read_epa() -> Tuple[pd.DataFrame, pd.DataFrame]:
     cat = open_catalog()
-    return cat.emissions.epa_inventory.read()
+    df = cat.emissions.epa_inventory.read()
+    df['actor'] = df['actor'].astype('category')
+    df['year'] = df['year'].astype('int32')
+    df = df.sort_values(['actor', 'year']).set_index('actor')
+    return df, annual_sum(df)
 
 
-@st.cache
-def read_eccc() -> pd.DataFrame:
+@st.cache_data(ttl=3600, show_spinner=False)
+def read_eccc() -> Tuple[pd.DataFrame, pd.DataFrame]:
     cat = open_catalog()
-    return cat.emissions.eccc_inventory.read()
+    df = cat.emissions.eccc_inventory.read()
+    df['actor'] = df['actor'].astype('category')
+    df['year'] = df['year'].astype('int32')
+    df = df.sort_values(['actor', 'year']).set_index('actor')
+    return df, annual_sum(df)
 
 
 # ---------------------------------------------------------------------
 # read actor actor names using intake-OpenClimate
 # ---------------------------------------------------------------------
-@st.cache
+@st.cache_data(ttl=3600, show_spinner=False)
 def read_countries() -> pd.DataFrame:
     cat = open_catalog()
-    return cat.actors.country.read()
+    df = cat.actors.country.read()
+    df['actor'] = df['actor'].astype('category')
+    return df
 
 
-@st.cache
+@st.cache_data(ttl=3600, show_spinner=False)
 def read_subnational() -> pd.DataFrame:
     cat = open_catalog()
     return cat.actors.subnational.read()
 
 
-@st.cache
+@st.cache_data(ttl=3600, show_spinner=False)
 def get_country_names() -> List[str]:
     cat = open_catalog()
     return list(cat.actors.country.read()['name'])
 
 
+# ---------------------------------------------------------------------
+# build figures, cached as PNG so identical selections skip matplotlib
+# ---------------------------------------------------------------------
+def _new_axes() -> Tuple[Figure, plt.Axes]:
+    # a plain Figure, not registered with pyplot, so it is freed after rendering
+    fig = Figure(figsize=(6, 6), constrained_layout=False)
+    ax = fig.subplots()
+
+    # limits are set once by _style, so skip autoscaling after every plot call
+    ax.set_autoscale_on(False)
+    return fig, ax
+
+
+def _fig_to_png(fig: Figure) -> bytes:
+    buf = io.BytesIO()
+    fig.savefig(buf, format='png', dpi=200, bbox_inches='tight')
+    return buf.getvalue()
+
+
+def _style(ax: plt.Axes, ylim: Tuple[float, float], xlim: Tuple[float, float] = (1990, 2022)) -> None:
+    from matplotlib.ticker import AutoMinorLocator
+
+    ax.set_ylim(ylim)
+    ax.set_xlim(xlim)
+
+    # Turn off the display of all ticks.
+    ax.tick_params(which='both',  # Options for both major and minor ticks
+                   top='off',        # turn off top ticks
+                   left='off',       # turn off left ticks
+                   right='off',      # turn off right ticks
+                   bottom='off')     # turn off bottom ticks
+
+    # Remove x tick marks
+    plt.setp(ax.get_xticklabels(), rotation=0)
+
+    # Hide the right and top spines
+    ax.spines['right'].set_visible(False)
+    ax.spines['left'].set_visible(False)
+    ax.spines['top'].set_visible(False)
+    ax.spines['bottom'].set_visible(False)
+
+    # Only show ticks on the left and bottom spines
+    ax.yaxis.set_ticks_position('left')
+    ax.xaxis.set_ticks_position('bottom')
+
+    # major/minor tick lines
+    # ax.minorticks_on()
+    ax.yaxis.set_minor_locator(AutoMinorLocator(4))
+    ax.xaxis.set_minor_locator(AutoMinorLocator(4))
+    ax.grid(axis='y', which='major', color=[
+            0.8, 0.8, 0.8], linestyle='-')
+
+    ax.set_ylabel("Emissions (GtCO$_2$e)")
+
+
+@st.cache_data(ttl=3600, max_entries=64, show_spinner=False)
+def _build_country_fig(codes: tuple) -> bytes:
+    unfccc = read_unfccc()
+
+    # create figure
+    fig, ax = _new_axes()
+
+    # line segments, colors and legend entries, drawn as two collections
+    segments = []
+    target_segments = []
+    colors = []
+    handles = []
+
+    # fetch pledges concurrently, the requests are independent
+    codes = [actor_id for actor_id in codes if actor_id in unfccc.index]
+    with ThreadPoolExecutor(max_workers=8) as ex:
+        pledges = dict(zip(codes, ex.map(get_actor_pledge, codes)))
+
+    # set the max value once, over all selected actors
+    ymax = np.nanmax(unfccc.loc[codes, 'total_emissions'].to_numpy(dtype=float) * CONVERSION,
+                     initial=0.1)
+
+    for actor_id in codes:
+        # get data for actor_id, a slice of the sorted actor index
+        data = unfccc.loc[actor_id:actor_id]
+        years = data['year'].to_numpy(dtype=np.float64, copy=False)
+        y = data['total_emissions'].to_numpy(dtype=np.float64, copy=False) * CONVERSION
+
+        # target emissions
+        #target_emissions = get_target_emissions(data, pledges[actor_id]) * CONVERSION
+        target_dict = get_target_emissions_dict(data, pledges[actor_id])
+        target_emissions = target_dict['target_emissions'] * CONVERSION
+        baseline_year = target_dict['baseline_year']
+
+        # line for each actor
+        color = plt.cm.tab10(len(colors) % 10)
+        colors.append(color)
+        segments.append(np.column_stack([years, y]))
+        handles.append(Line2D([], [], color=color,
+                              linewidth=2, label=actor_id))
+
+        # get pledges
+        target_segments.append([(baseline_year, target_emissions),
+                                (years[-1], target_emissions)])
+        handles.append(Line2D([], [], color=color, linestyle='--',
+                              label=f'{actor_id} target level'))
+
+    ax.add_collection(LineCollection(
+        segments, linewidths=2, colors=colors), autolim=False)
+    ax.add_collection(LineCollection(
+        target_segments, colors=colors, linestyles='dashed'), autolim=False)
+
+    _style(ax, (0, ymax))
+
+    ax.legend(handles=handles, loc='lower right', frameon=False)
+
+    return _fig_to_png(fig)
+
+
+@st.cache_data(ttl=3600, show_spinner=False)
+def _build_subnational_figs(actor_id: str) -> Tuple[bytes, bytes]:
+    unfccc = read_unfccc()
+    df_subnat, df_sum = read_eccc() if actor_id == 'CA' else read_epa()
+
+    # ---------------------------------------------------------------------
+    # Plot country and subnational total
+    # ---------------------------------------------------------------------
+    # create figure
+    fig, ax = _new_axes()
+
+    # get data for actor_id
+    data = unfccc.loc[actor_id:actor_id]
+    years = data['year'].to_numpy(dtype=np.float64, copy=False)
+    country_total = data['total_emissions'].to_numpy(dtype=np.float64, copy=False) * CONVERSION
+
+    # set the max value, ignoring missing years
+    ymax = np.nanmax(country_total)
+
+    # plot for aeach actor
+    ax.plot(years, country_total, linewidth=2, label=actor_id)
+
+    subnational_total = df_sum.total_emissions.to_numpy(dtype=np.float64, copy=False) * CONVERSION
+    ax.plot(df_sum.year.to_numpy(dtype=np.float64, copy=False), subnational_total, linewidth=2,
+            label='Sum of Subnationals', linestyle='dashed')
+
+    _style(ax, (0, ymax))
+
+    ax.legend(loc='lower right', frameon=False)
+
+    total_png = _fig_to_png(fig)
+
+    # ---------------------------------------------------------------------
+    # Plot difference
+    # ---------------------------------------------------------------------
+    # create figure
+    fig, ax = _new_axes()
+
+    difference = country_total - subnational_total
+    # set the max value once, over the difference and all subnationals
+    ymax = max(np.nanmax(np.abs(difference)),
+               df_subnat['total_emissions'].max() * CONVERSION)
+    year_range = [1990, 2022]
+
+    # reference lint
+    ax.plot(year_range, [0, 0], linewidth=1, color='k')
+
+    # plot all the subnationals as a single line, NaNs break it between actors
+    # first row of each actor (after the first) marks a line break
+    breaks = np.flatnonzero(~df_subnat.index.duplicated())[1:]
+    subnat_years = np.insert(
+        df_subnat['year'].to_numpy(dtype=float), breaks, np.nan)
+    subnat_emissions = np.insert(
+        df_subnat['total_emissions'].to_numpy(dtype=float), breaks, np.nan) * CONVERSION
+    ax.plot(subnat_years, subnat_emissions,
+            color=[0.8, 0.8, 0.8], linewidth=1, label='Subnational')
+
+    # plot difference
+    ax.plot(years, difference, linewidth=2,
+            label='Difference')
+
+    _style(ax, (-ymax, ymax), year_range)
+
+    ax.legend(loc='lower right', frameon=False)
+
+    return total_png, _fig_to_png(fig)
+
+
 # ---------------------------------------------------------------------
 # layout and containers
 # ---------------------------------------------------------------------
@@ -117,12 +387,18 @@ with sidebar:
     st.subheader(
         "Code available on [GitHub](https://github.com/Open-Earth-Foundation/streamlit-OpenClimate)")
 
-with country_container:
-    # load data, it is cached for speed
-    country_names = get_country_names()
-    countries = read_countries()
-    unfccc = read_unfccc()
+# ---------------------------------------------------------------------
+# shared data, loaded once per rerun (it is cached for speed)
+# ---------------------------------------------------------------------
+country_names = _timed_call(get_country_names)
+countries = _timed_call(read_countries)
+
+# the figure builders read these from the cache, loading them here
+# records a hit or miss for every rerun
+for loader in (read_unfccc, read_epa, read_eccc):
+    _timed_call(loader)
 
+with country_container:
     st.title("Time series of country emissions")
     st.markdown('''
     Here you can display country emissions for Annex 1 countries. Data is from [UNFCCC](https://di.unfccc.int/time_series).
@@ -139,81 +415,11 @@ with country_container:
         country_codes = countries.loc[countries['name'].isin(options), 'actor']
 
         st.subheader("Country Emissions")
-        # create figure
-        fig = plt.figure(figsize=(6, 6))
-        ax = fig.add_subplot(111)
-
-        ymax = 0.1
-        for actor_id in country_codes:
-            # tonnes to giggatonnes
-            conversion = 1 / 10**9
-
-            # get data for actor_id
-            data = unfccc.loc[unfccc['actor'] == actor_id]
-
-            # set the max value, this is kludgy
-            ymax_tmp = (data['total_emissions'] * conversion).max()
-            ymax = ymax_tmp if ymax_tmp > ymax else ymax
-
-            # target emissions
-            #target_emissions = get_target_emissions(data, actor_id) * conversion
-            target_dict = get_target_emissions_dict(data, actor_id)
-            target_emissions = target_dict['target_emissions'] * conversion
-            baseline_year = target_dict['baseline_year']
-
-            # plot for aeach actor
-            ax.plot(data['year'],
-                    data['total_emissions'] * conversion, linewidth=2, label=actor_id)
-
-            # get pledges
-            ax.plot([baseline_year, list(data['year'])[-1]],
-                    [target_emissions, target_emissions], '--', label=f'{actor_id} target level')
-
-            ax.set_ylim([0, ymax])
-            ax.set_xlim([1990, 2022])
-
-            # Turn off the display of all ticks.
-            ax.tick_params(which='both',  # Options for both major and minor ticks
-                           top='off',        # turn off top ticks
-                           left='off',       # turn off left ticks
-                           right='off',      # turn off right ticks
-                           bottom='off')     # turn off bottom ticks
-
-            # Remove x tick marks
-            plt.setp(ax.get_xticklabels(), rotation=0)
-
-            # Hide the right and top spines
-            ax.spines['right'].set_visible(False)
-            ax.spines['left'].set_visible(False)
-            ax.spines['top'].set_visible(False)
-            ax.spines['bottom'].set_visible(False)
-
-            # Only show ticks on the left and bottom spines
-            ax.yaxis.set_ticks_position('left')
-            ax.xaxis.set_ticks_position('bottom')
-
-            # major/minor tick lines
-            # ax.minorticks_on()
-            ax.yaxis.set_minor_locator(AutoMinorLocator(4))
-            ax.xaxis.set_minor_locator(AutoMinorLocator(4))
-            ax.grid(axis='y', which='major', color=[
-                    0.8, 0.8, 0.8], linestyle='-')
-
-            ax.set_ylabel("Emissions (GtCO$_2$e)")
-
-        plt.legend(loc='lower right', frameon=False)
-
-        st.pyplot(fig)
+        st.image(_timed_call(_build_country_fig,
+                             tuple(sorted(country_codes))))
 
 
 with subnational_container:
-    # load data, it is cached for speed
-    country_names = get_country_names()
-    countries = read_countries()
-    unfccc = read_unfccc()
-    df_epa = read_epa()
-    df_eccc = read_eccc()
-
     st.title("Do subnational emissions budet?")
     st.markdown('''
     Here you can explore if emissions reported from subnational actors adds up to data reported by national actors. 
@@ -230,160 +436,22 @@ with subnational_container:
         actor_id = countries.loc[countries['name']
                                  == option, 'actor'].values[0]
 
-        # ---------------------------------------------------------------------
-        # Plot country and subnational total
-        # ---------------------------------------------------------------------
+        total_png, difference_png = _timed_call(
+            _build_subnational_figs, actor_id)
+
         st.subheader("National and sum of subational emissions")
-        # create figure
-        fig = plt.figure(figsize=(6, 6))
-        ax = fig.add_subplot(111)
-
-        # tonnes to giggatonnes
-        conversion = 1 / 10**9
-
-        # get data for actor_id
-        data = unfccc.loc[unfccc['actor'] == actor_id]
-        country_total = data['total_emissions'] * conversion
-
-        # set the max value, this is kludgy
-        ymax = (country_total).max()
-
-        # plot for aeach actor
-        ax.plot(data['year'], country_total, linewidth=2, label=actor_id)
-
-        if actor_id == 'CA':
-            df_sum = df_eccc[['year', 'total_emissions']
-                             ].groupby(by=['year']).sum().reset_index()
-            subnational_total = df_sum.total_emissions * conversion
-            ax.plot(df_sum.year, subnational_total, linewidth=2,
-                    label='Sum of Subnationals', linestyle='dashed')
-
-        if actor_id == 'US':
-            df_sum = df_epa[['year', 'total_emissions']
-                            ].groupby(by=['year']).sum().reset_index()
-            subnational_total = df_sum.total_emissions * conversion
-            ax.plot(df_sum.year, subnational_total, linewidth=2,
-                    label='Sum of Subnationals', linestyle='dashed')
-
-        ax.set_ylim([0, ymax])
-        ax.set_xlim([1990, 2022])
-
-        # Turn off the display of all ticks.
-        ax.tick_params(which='both',  # Options for both major and minor ticks
-                       top='off',        # turn off top ticks
-                       left='off',       # turn off left ticks
-                       right='off',      # turn off right ticks
-                       bottom='off')     # turn off bottom ticks
-
-        # Remove x tick marks
-        plt.setp(ax.get_xticklabels(), rotation=0)
-
-        # Hide the right and top spines
-        ax.spines['right'].set_visible(False)
-        ax.spines['left'].set_visible(False)
-        ax.spines['top'].set_visible(False)
-        ax.spines['bottom'].set_visible(False)
-
-        # Only show ticks on the left and bottom spines
-        ax.yaxis.set_ticks_position('left')
-        ax.xaxis.set_ticks_position('bottom')
-
-        # major/minor tick lines
-        # ax.minorticks_on()
-        ax.yaxis.set_minor_locator(AutoMinorLocator(4))
-        ax.xaxis.set_minor_locator(AutoMinorLocator(4))
-        ax.grid(axis='y', which='major', color=[
-                0.8, 0.8, 0.8], linestyle='-')
-
-        ax.set_ylabel("Emissions (GtCO$_2$e)")
-
-        plt.legend(loc='lower right', frameon=False)
-
-        st.pyplot(fig)
-
-        # ---------------------------------------------------------------------
-        # Plot difference
-        # ---------------------------------------------------------------------
+        st.image(total_png)
+
         st.subheader("Subnational Emissions + Difference")
-        # create figure
-        fig = plt.figure(figsize=(6, 6))
-        ax = fig.add_subplot(111)
-
-        difference = country_total.values - subnational_total.values
-        # set the max value, this is kludgy
-        ymax = abs(difference).max()
-        year_range = [1990, 2022]
-
-        # reference lint
-        ax.plot(year_range, [0, 0], linewidth=1, color='k')
-
-        # plot all the subnationals
-        if actor_id == 'CA':
-            ind = 1
-            for actor in set(df_eccc.actor):
-                subnat_data = df_eccc.loc[df_eccc.actor == actor]
-                subnat_emissions = subnat_data.total_emissions * conversion
-                ymax_tmp = subnat_emissions.max()
-                ymax = ymax_tmp if ymax_tmp > ymax else ymax
-                if ind == 1:
-                    ind += 1
-                    ax.plot(subnat_data.year,
-                            subnat_emissions, color=[0.8, 0.8, 0.8], linewidth=1, label='Subnational')
-                else:
-                    ax.plot(subnat_data.year,
-                            subnat_emissions, color=[0.8, 0.8, 0.8], linewidth=1)
-
-        if actor_id == 'US':
-            ind = 1
-            for actor in set(df_epa.actor):
-                subnat_data = df_epa.loc[df_epa.actor == actor]
-                subnat_emissions = subnat_data.total_emissions * conversion
-                ymax_tmp = subnat_emissions.max()
-                ymax = ymax_tmp if ymax_tmp > ymax else ymax
-                if ind == 1:
-                    ind += 1
-                    ax.plot(subnat_data.year,
-                            subnat_emissions, color=[0.8, 0.8, 0.8], linewidth=1, label='Subnational')
-                else:
-                    ax.plot(subnat_data.year,
-                            subnat_emissions, color=[0.8, 0.8, 0.8], linewidth=1)
-
-        # plot difference
-        ax.plot(data['year'], difference, linewidth=2,
-                label='Difference')
-
-        ax.set_ylim([-ymax, ymax])
-        ax.set_xlim(year_range)
-
-        # Turn off the display of all ticks.
-        ax.tick_params(which='both',  # Options for both major and minor ticks
-                       top='off',        # turn off top ticks
-                       left='off',       # turn off left ticks
-                       right='off',      # turn off right ticks
-                       bottom='off')     # turn off bottom ticks
-
-        # Remove x tick marks
-        plt.setp(ax.get_xticklabels(), rotation=0)
-
-        # Hide the right and top spines
-        ax.spines['right'].set_visible(False)
-        ax.spines['left'].set_visible(False)
-        ax.spines['top'].set_visible(False)
-        ax.spines['bottom'].set_visible(False)
-
-        # Only show ticks on the left and bottom spines
-        ax.yaxis.set_ticks_position('left')
-        ax.xaxis.set_ticks_position('bottom')
-
-        # major/minor tick lines
-        # ax.minorticks_on()
-        ax.yaxis.set_minor_locator(AutoMinorLocator(4))
-        ax.xaxis.set_minor_locator(AutoMinorLocator(4))
-        ax.grid(axis='y', which='major', color=[
-                0.8, 0.8, 0.8], linestyle='-')
-
-        ax.set_ylabel("Emissions (GtCO$_2$e)")
-
-        plt.legend(loc='lower right', frameon=False)
-
-        st.pyplot(fig)
+        st.image(difference_png)
+
+
+# ---------------------------------------------------------------------
+# cache timings, rendered last so they include this rerun
+# ---------------------------------------------------------------------
+with sidebar:
+    with st.expander("Cache stats"):
+        cache_stats = pd.DataFrame.from_dict(
+            st.session_state.get('_cache_stats', {}), orient='index',
+            columns=['last_runtime (s)', 'call_count'])
+        st.table(cache_stats)